@@ -1,48 +1,122 @@
 import pandas as pd
+from collections import defaultdict
+from dataclasses import dataclass, asdict, astuple
 from datetime import datetime
+import atexit
+import csv
 import os
 
+PRODUCT_COLUMNS = ['name', 'url', 'current_price', 'alert_price', 'last_updated']
+HISTORY_COLUMNS = ['url', 'price', 'timestamp']
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+@dataclass(slots=True)
+class ProductRecord:
+    name: str
+    url: str
+    current_price: float
+    alert_price: float
+    last_updated: str
+
 class DataManager:
     def __init__(self):
         self.products_file = 'products.csv'
         self.history_file = 'price_history.csv'
         self._initialize_storage()
+        self._load_storage()
+        self._open_history()
+        atexit.register(self.close)
 
     def _initialize_storage(self):
         """Initialize CSV files if they don't exist"""
-        if not os.path.exists(self.products_file):
-            pd.DataFrame(columns=[
-                'name', 'url', 'current_price', 'alert_price', 'last_updated'
-            ]).to_csv(self.products_file, index=False)
+        for path, columns in ((self.products_file, PRODUCT_COLUMNS),
+                              (self.history_file, HISTORY_COLUMNS)):
+            if not os.path.exists(path):
+                with open(path, 'w', newline='') as f:
+                    csv.writer(f).writerow(columns)
+
+    def _load_storage(self):
+        """Load products and price history into memory once"""
+        with open(self.products_file, newline='') as f:
+            self._by_url = {
+                row['url']: ProductRecord(
+                    name=row['name'],
+                    url=row['url'],
+                    current_price=float(row['current_price']),
+                    alert_price=float(row['alert_price']),
+                    last_updated=row['last_updated']
+                )
+                for row in csv.DictReader(f)
+            }
+
+        self._hist_index = defaultdict(list)
+        with open(self.history_file, newline='') as f:
+            for row in csv.DictReader(f):
+                self._hist_index[row['url']].append((row['timestamp'], float(row['price'])))
+
+    def _open_history(self):
+        """Open the buffered append handle used for price ticks"""
+        self._hist_fh = open(self.history_file, 'a', buffering=65536, newline='')
+        self._hist_writer = csv.writer(self._hist_fh)
+
+    def close(self):
+        """Flush and close the price history file"""
+        if not self._hist_fh.closed:
+            self._hist_fh.close()
+
+    def _write_csv(self, path: str, columns: list, rows):
+        """Write a CSV file atomically via a temp file and os.replace"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', newline='', buffering=1 << 16) as f:
+            writer = csv.writer(f)
+            writer.writerow(columns)
+            writer.writerows(rows)
+        os.replace(tmp_path, path)
 
-        if not os.path.exists(self.history_file):
-            pd.DataFrame(columns=[
-                'url', 'price', 'timestamp'
-            ]).to_csv(self.history_file, index=False)
+    def _save_products(self):
+        """Write the in-memory products to the products file"""
+        self._write_csv(
+            self.products_file,
+            PRODUCT_COLUMNS,
+            (astuple(product) for product in self._by_url.values())
+        )
+
+    def _save_history(self):
+        """Write the in-memory price history to the history file"""
+        self.close()
+        self._write_csv(
+            self.history_file,
+            HISTORY_COLUMNS,
+            ((url, price, ts) for url, records in self._hist_index.items() for ts, price in records)
+        )
+        self._open_history()
+
+    def _record_price(self, url: str, price: float, ts: str):
+        """Append a price tick to the history index and file"""
+        self._hist_index[url].append((ts, price))
+        self._hist_writer.writerow((url, price, ts))
 
     def add_product(self, name: str, url: str, price: float, alert_price: float) -> bool:
         """Add a new product to track"""
         try:
-            products = pd.read_csv(self.products_file)
-
             # Check if product already exists
-            if url in products['url'].values:
+            if url in self._by_url:
                 return False
 
-            # Add new product
-            new_product = pd.DataFrame([{
-                'name': name,
-                'url': url,
-                'current_price': price,
-                'alert_price': alert_price,
-                'last_updated': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }])
-
-            products = pd.concat([products, new_product], ignore_index=True)
-            products.to_csv(self.products_file, index=False)
+            # Add new product as a single appended row
+            product = ProductRecord(
+                name=name,
+                url=url,
+                current_price=price,
+                alert_price=alert_price,
+                last_updated=datetime.now().strftime(TIMESTAMP_FORMAT)
+            )
+            self._by_url[url] = product
+            with open(self.products_file, 'a', newline='') as f:
+                csv.writer(f).writerow(astuple(product))
 
             # Add first price point to history
-            self.update_price(url, price, datetime.now())
+            self._record_price(url, price, product.last_updated)
             return True
         except Exception as e:
             print(f"Error adding product: {e}")
@@ -52,14 +126,12 @@ class DataManager:
         """Delete a product and its price history"""
         try:
             # Remove from products file
-            products = pd.read_csv(self.products_file)
-            products = products[products['url'] != url]
-            products.to_csv(self.products_file, index=False)
+            self._by_url.pop(url, None)
+            self._save_products()
 
             # Remove from history file
-            history = pd.read_csv(self.history_file)
-            history = history[history['url'] != url]
-            history.to_csv(self.history_file, index=False)
+            if self._hist_index.pop(url, None) is not None:
+                self._save_history()
             return True
         except Exception as e:
             print(f"Error deleting product: {e}")
@@ -68,21 +140,17 @@ class DataManager:
     def update_price(self, url: str, price: float, timestamp: datetime):
         """Update price for a product and record in history"""
         try:
+            ts = timestamp.strftime(TIMESTAMP_FORMAT)
+
             # Update current price
-            products = pd.read_csv(self.products_file)
-            products.loc[products['url'] == url, 'current_price'] = price
-            products.loc[products['url'] == url, 'last_updated'] = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            products.to_csv(self.products_file, index=False)
+            product = self._by_url.get(url)
+            if product is not None:
+                product.current_price = price
+                product.last_updated = ts
+                self._save_products()
 
             # Add to history
-            history = pd.read_csv(self.history_file)
-            new_record = pd.DataFrame([{
-                'url': url,
-                'price': price,
-                'timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S')
-            }])
-            history = pd.concat([history, new_record], ignore_index=True)
-            history.to_csv(self.history_file, index=False)
+            self._record_price(url, price, ts)
             return True
         except Exception as e:
             print(f"Error updating price: {e}")
@@ -91,7 +159,21 @@ class DataManager:
     def get_all_products(self) -> pd.DataFrame:
         """Get all tracked products"""
         try:
-            return pd.read_csv(self.products_file)
+            products = pd.DataFrame(
+                [asdict(product) for product in self._by_url.values()],
+                columns=PRODUCT_COLUMNS
+            ).astype({
+                'name': 'string',
+                'url': 'string',
+                'current_price': 'float32',
+                'alert_price': 'float32'
+            })
+            # Parse timestamps once for the whole column rather than per card
+            # Malformed timestamps become NaT instead of failing the whole list
+            products['last_updated'] = pd.to_datetime(
+                products['last_updated'], format=TIMESTAMP_FORMAT, errors='coerce', cache=True
+            )
+            return products
         except Exception as e:
             print(f"Error getting products: {e}")
             return pd.DataFrame()
@@ -99,10 +181,15 @@ class DataManager:
     def get_price_history(self, url: str) -> pd.DataFrame:
         """Get price history for a specific product"""
         try:
-            history = pd.read_csv(self.history_file)
-            product_history = history[history['url'] == url].copy()
-            product_history['timestamp'] = pd.to_datetime(product_history['timestamp'])
-            return product_history.sort_values('timestamp')
+            product_history = pd.DataFrame(
+                self._hist_index.get(url, []),
+                columns=['timestamp', 'price']
+            )
+            product_history['url'] = url
+            product_history['timestamp'] = pd.to_datetime(
+                product_history['timestamp'], format=TIMESTAMP_FORMAT, cache=True
+            )
+            return product_history[HISTORY_COLUMNS].sort_values('timestamp')
         except Exception as e:
             print(f"Error getting price history: {e}")
-            return pd.DataFrame()
\ No newline at end of file
+            return pd.DataFrame()
@@ -1,17 +1,32 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime
 from fpdf import FPDF
 import plotly.graph_objects as go
 import plotly.io as pio
 import os
+import hashlib
 from pathlib import Path
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Number of rendered inventory charts kept in the report directory
+CHART_CACHE_SIZE = 5
+
+# Status glyphs used in the report text
+GREEN = "🟢"
+RED = "🔴"
+BULLET = "•"
+
 class DiagnosticReport:
     def __init__(self, pantry_manager, inventory_data):
         self.pantry_manager = pantry_manager
+        # Frames built from row-major arrays store each column strided; copy
+        # so the column reductions below walk contiguous memory
+        numeric_columns = inventory_data.select_dtypes('number').columns
+        if not all(inventory_data[col].to_numpy().flags.c_contiguous for col in numeric_columns):
+            inventory_data = inventory_data.copy()
         self.inventory_data = inventory_data
         self.report_dir = Path("reports")
         self.report_dir.mkdir(exist_ok=True)
@@ -19,21 +34,35 @@ class DiagnosticReport:
     def generate_inventory_chart(self):
         """Generate inventory status chart"""
         try:
+            # Reuse the chart rendered for the same plotted columns
+            data_hash = pd.util.hash_pandas_object(
+                self.inventory_data[['name', 'quantity', 'capacity']], index=False
+            )
+            key = hashlib.blake2b(data_hash.values.tobytes(), digest_size=16).hexdigest()
+            chart_path = self.report_dir / f"inventory_chart_{key}.png"
+            if chart_path.exists():
+                chart_path.touch()
+                return chart_path
+
+            names = self.inventory_data['name']
+            quantity = self.inventory_data['quantity']
+            capacity = self.inventory_data['capacity']
+            fill_pct = (quantity / capacity * 100).map('{:.1f}%'.format)
+
             fig = go.Figure()
-            for _, item in self.inventory_data.iterrows():
-                fig.add_trace(go.Bar(
-                    name=item['name'],
-                    x=[item['name']],
-                    y=[item['quantity']],
-                    text=f"{(item['quantity']/item['capacity'])*100:.1f}%",
-                    textposition='auto',
-                ))
-                fig.add_trace(go.Bar(
-                    name=f"{item['name']} (Remaining)",
-                    x=[item['name']],
-                    y=[item['capacity'] - item['quantity']],
-                    marker_color='lightgray'
-                ))
+            fig.add_trace(go.Bar(
+                name='Filled',
+                x=names,
+                y=quantity,
+                text=fill_pct,
+                textposition='auto',
+            ))
+            fig.add_trace(go.Bar(
+                name='Remaining',
+                x=names,
+                y=capacity - quantity,
+                marker_color='lightgray'
+            ))
 
             fig.update_layout(
                 title="Inventory Levels",
@@ -43,13 +72,26 @@ class DiagnosticReport:
             )
 
             # Save as PNG for PDF inclusion
-            chart_path = self.report_dir / "inventory_chart.png"
-            fig.write_image(str(chart_path))
+            chart_path.write_bytes(pio.to_image(fig, format='png', engine='kaleido'))
+            self._prune_chart_cache()
             return chart_path
         except Exception as e:
             logger.error(f"Error generating inventory chart: {e}")
             return None
 
+    def _prune_chart_cache(self):
+        """Remove all but the most recently used inventory charts"""
+        try:
+            charts = sorted(
+                self.report_dir.glob("inventory_chart_*.png"),
+                key=lambda path: path.stat().st_mtime,
+                reverse=True
+            )
+            for stale_chart in charts[CHART_CACHE_SIZE:]:
+                stale_chart.unlink()
+        except Exception as e:
+            logger.error(f"Error pruning chart cache: {e}")
+
     def generate_report(self):
         """Generate comprehensive diagnostic report"""
         try:
@@ -70,15 +112,18 @@ class DiagnosticReport:
 
             # Pantry Status
             pdf.cell(0, 10, 'Pantry Locations Status:', ln=True)
-            locations = self.pantry_manager.get_all_locations()
-            for _, pantry in locations.iterrows():
-                status = self.pantry_manager.get_pantry_status(pantry['name'])
+            statuses = self.pantry_manager.get_all_statuses()
+            blocks = []
+            for name, status in statuses.items():
                 if status:
-                    pdf.cell(0, 5, f"• {pantry['name']}", ln=True)
-                    pdf.cell(0, 5, f"  - Status: {'Open' if status['is_open'] else 'Closed'}", ln=True)
-                    pdf.cell(0, 5, f"  - Inventory: {status['inventory_percentage']:.1f}% full", ln=True)
-                    pdf.cell(0, 5, f"  - Services: {', '.join(status['services'])}", ln=True)
-                    pdf.cell(0, 5, '', ln=True)
+                    blocks.append(
+                        f"{BULLET} {name}\n"
+                        f"  - Status: {'Open' if status['is_open'] else 'Closed'}\n"
+                        f"  - Inventory: {status['inventory_percentage']:.1f}% full\n"
+                        f"  - Services: {', '.join(status['services'])}\n\n"
+                    )
+            if blocks:
+                pdf.multi_cell(0, 5, "".join(blocks), align='L')
 
             # Inventory Status
             pdf.add_page()
@@ -96,17 +141,19 @@ class DiagnosticReport:
             pdf.cell(0, 10, 'Critical Items', ln=True)
             pdf.set_font('Arial', '', 10)
 
-            critical_items_found = False
-            for _, item in self.inventory_data.iterrows():
-                if item['quantity'] <= item['min_threshold']:
-                    critical_items_found = True
-                    pdf.cell(0, 5, f"• {item['name']}", ln=True)
-                    pdf.cell(0, 5, f"  - Current: {item['quantity']} units", ln=True)
-                    pdf.cell(0, 5, f"  - Minimum Threshold: {item['min_threshold']} units", ln=True)
-                    pdf.cell(0, 5, '', ln=True)
-
-            if not critical_items_found:
+            inventory = self.inventory_data
+            critical = inventory[inventory['quantity'] <= inventory['min_threshold']]
+            if critical.empty:
                 pdf.cell(0, 5, "No critical items at this time.", ln=True)
+            else:
+                pdf.multi_cell(0, 5, "".join(
+                    f"{BULLET} {name}\n"
+                    f"  - Current: {quantity} units\n"
+                    f"  - Minimum Threshold: {min_threshold} units\n\n"
+                    for name, quantity, min_threshold in zip(
+                        critical['name'], critical['quantity'], critical['min_threshold']
+                    )
+                ), align='L')
 
             # System Health
             pdf.add_page()
@@ -115,39 +162,44 @@ class DiagnosticReport:
             pdf.set_font('Arial', '', 10)
 
             # Storage Status
-            total_capacity = sum(self.inventory_data['capacity'])
-            total_inventory = sum(self.inventory_data['quantity'])
+            total_capacity = int(inventory['capacity'].sum())
+            total_inventory = int(inventory['quantity'].sum())
             utilization = (total_inventory / total_capacity) * 100 if total_capacity > 0 else 0
 
-            pdf.cell(0, 5, 'Storage Utilization:', ln=True)
-            pdf.cell(0, 5, f"• Total Capacity: {total_capacity} units", ln=True)
-            pdf.cell(0, 5, f"• Current Total: {total_inventory} units", ln=True)
-            pdf.cell(0, 5, f"• Utilization: {utilization:.1f}%", ln=True)
-            pdf.cell(0, 5, '', ln=True)
+            pdf.multi_cell(0, 5, (
+                'Storage Utilization:\n'
+                f"{BULLET} Total Capacity: {total_capacity} units\n"
+                f"{BULLET} Current Total: {total_inventory} units\n"
+                f"{BULLET} Utilization: {utilization:.1f}%\n\n"
+            ), align='L')
 
             # Temperature and Humidity Status
             pdf.cell(0, 5, 'Environmental Conditions:', ln=True)
-            for _, item in self.inventory_data.iterrows():
-                if item['storage_condition'] == 'refrigerated':
-                    temp_status = "🟢" if 2 <= item['temperature'] <= 6 else "🔴"
-                else:
-                    temp_status = "🟢" if 18 <= item['temperature'] <= 24 else "🔴"
-                humidity_status = "🟢" if 40 <= item['humidity'] <= 60 else "🔴"
-
-                pdf.cell(0, 5, f"• {item['name']}:", ln=True)
-                pdf.cell(0, 5, f"  - Temperature: {temp_status} {item['temperature']:.1f}°C", ln=True)
-                pdf.cell(0, 5, f"  - Humidity: {humidity_status} {item['humidity']:.1f}%", ln=True)
-                pdf.cell(0, 5, '', ln=True)
+            is_refrigerated = inventory['storage_condition'] == 'refrigerated'
+            temp_ok = np.where(
+                is_refrigerated,
+                inventory['temperature'].between(2, 6),
+                inventory['temperature'].between(18, 24)
+            )
+            temp_status = np.where(temp_ok, GREEN, RED)
+            humidity_status = np.where(inventory['humidity'].between(40, 60), GREEN, RED)
+
+            if not inventory.empty:
+                pdf.multi_cell(0, 5, "".join(
+                    f"{BULLET} {name}:\n"
+                    f"  - Temperature: {temp_glyph} {temperature:.1f}°C\n"
+                    f"  - Humidity: {humidity_glyph} {humidity:.1f}%\n\n"
+                    for name, temperature, temp_glyph, humidity, humidity_glyph in zip(
+                        inventory['name'], inventory['temperature'], temp_status,
+                        inventory['humidity'], humidity_status
+                    )
+                ), align='L')
 
             # Save report
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             report_path = self.report_dir / f"diagnostic_report_{timestamp}.pdf"
             pdf.output(str(report_path))
 
-            # Cleanup temporary files
-            if chart_path and chart_path.exists():
-                chart_path.unlink()
-
             return report_path
         except Exception as e:
             logger.error(f"Error generating diagnostic report: {e}")
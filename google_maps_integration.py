@@ -4,6 +4,7 @@ import json
 import logging
 import os
 from pathlib import Path
+from string import Template
 
 # Configure logging
 logging.basicConfig(
@@ -12,6 +13,167 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# JavaScript templates, built once at import and filled per call
+_MARKER_TPL = Template("""
+        try {
+            if (!window.map) {
+                console.error('Map not initialized');
+                return;
+            }
+            const marker = new google.maps.Marker({
+                position: { lat: $lat, lng: $lng },
+                map: window.map,
+                title: $title,
+                $icon_line
+                animation: google.maps.Animation.DROP
+            });
+        $info_block} catch (error) { console.error('Error adding marker:', error); }""")
+
+_INFO_WINDOW_TPL = Template("""
+            const infoWindow = new google.maps.InfoWindow({
+                content: $content
+            });
+            marker.addListener("click", () => {
+                infoWindow.open({
+                    anchor: marker,
+                    map: window.map
+                });
+            });
+            """)
+
+_MARKERS_TPL = Template("""
+        try {
+            if (!window.map) {
+                console.error('Map not initialized');
+                return;
+            }
+            for (const m of $markers) {
+                const marker = new google.maps.Marker({
+                    position: { lat: m.lat, lng: m.lng },
+                    map: window.map,
+                    title: m.title,
+                    icon: m.icon || undefined,
+                    animation: google.maps.Animation.DROP
+                });
+                if (m.info) {
+                    const infoWindow = new google.maps.InfoWindow({
+                        content: m.info
+                    });
+                    marker.addListener("click", () => {
+                        infoWindow.open({
+                            anchor: marker,
+                            map: window.map
+                        });
+                    });
+                }
+            }
+        } catch (error) { console.error('Error adding markers:', error); }""")
+
+_CENTER_TPL = Template("""
+        try {
+            window.map.setCenter({ lat: $lat, lng: $lng });
+            window.map.setZoom($zoom);
+        } catch (error) {
+            console.error('Error centering map:', error);
+        }
+        """)
+
+_ROUTE_TPL = Template("""
+        try {
+            if (!window.directionsService) {
+                window.directionsService = new google.maps.DirectionsService();
+            }
+            const directionsRenderer = new google.maps.DirectionsRenderer({
+                map: window.map,
+                suppressMarkers: true,
+                polylineOptions: {
+                    strokeColor: '#2196F3',
+                    strokeWeight: 4
+                }
+            });
+
+            const request = {
+                origin: { lat: $origin_lat, lng: $origin_lng },
+                destination: { lat: $dest_lat, lng: $dest_lng },
+                travelMode: google.maps.TravelMode.DRIVING
+            };
+
+            window.directionsService.route(request, (response, status) => {
+                if (status === "OK") {
+                    directionsRenderer.setDirections(response);
+                } else {
+                    console.error('Directions request failed:', status);
+                }
+            });
+        } catch (error) {
+            console.error('Error drawing route:', error);
+        }
+        """)
+
+_ROUTES_TPL = Template("""
+        try {
+            if (!window.directionsService) {
+                window.directionsService = new google.maps.DirectionsService();
+            }
+            for (const r of $routes) {
+                const directionsRenderer = new google.maps.DirectionsRenderer({
+                    map: window.map,
+                    suppressMarkers: true,
+                    polylineOptions: {
+                        strokeColor: '#2196F3',
+                        strokeWeight: 4
+                    }
+                });
+
+                const request = {
+                    origin: { lat: r[0], lng: r[1] },
+                    destination: { lat: r[2], lng: r[3] },
+                    travelMode: google.maps.TravelMode.DRIVING
+                };
+
+                window.directionsService.route(request, (response, status) => {
+                    if (status === "OK") {
+                        directionsRenderer.setDirections(response);
+                    } else {
+                        console.error('Directions request failed:', status);
+                    }
+                });
+            }
+        } catch (error) {
+            console.error('Error drawing routes:', error);
+        }
+        """)
+
+_CLEAR_ROUTES_JS = """
+        try {
+            if (window.map) {
+                const directionsRenderer = new google.maps.DirectionsRenderer({
+                    map: window.map
+                });
+                directionsRenderer.setMap(null);
+            }
+        } catch (error) {
+            console.error('Error clearing routes:', error);
+        }
+        """
+
+_HEAT_MAP_TPL = Template("""
+        try {
+            const heatmapData = $locations.map(location => {
+                return new google.maps.LatLng(location.lat, location.lng);
+            });
+
+            const heatmap = new google.maps.visualization.HeatmapLayer({
+                data: heatmapData,
+                map: window.map,
+                radius: 50,
+                opacity: 0.6
+            });
+        } catch (error) {
+            console.error('Error creating heat map:', error);
+        }
+        """)
+
 def init_google_maps():
     """Initialize Google Maps JavaScript code"""
     try:
@@ -90,36 +252,13 @@ def add_marker(lat, lng, title, info=None, icon=None):
     """Add a marker to the map"""
     try:
         logger.info(f"Adding marker at {lat}, {lng}")
-        marker_js = f"""
-        try {{
-            if (!window.map) {{
-                console.error('Map not initialized');
-                return;
-            }}
-            const marker = new google.maps.Marker({{
-                position: {{ lat: {lat}, lng: {lng} }},
-                map: window.map,
-                title: "{title}",
-                {f'icon: "{icon}",' if icon else ''}
-                animation: google.maps.Animation.DROP
-            }});
-        """
-
-        if info:
-            info_content = json.dumps(info)
-            marker_js += f"""
-            const infoWindow = new google.maps.InfoWindow({{
-                content: {info_content}
-            }});
-            marker.addListener("click", () => {{
-                infoWindow.open({{
-                    anchor: marker,
-                    map: window.map
-                }});
-            }});
-            """
-
-        marker_js += "} catch (error) { console.error('Error adding marker:', error); }"
+        marker_js = _MARKER_TPL.substitute(
+            lat=lat,
+            lng=lng,
+            title=json.dumps(title),
+            icon_line=f"icon: {json.dumps(icon)}," if icon else "",
+            info_block=_INFO_WINDOW_TPL.substitute(content=json.dumps(info)) if info else ""
+        )
         streamlit_js_eval(js_expressions=marker_js)
         logger.info(f"Marker added successfully at {lat}, {lng}")
         return True
@@ -127,17 +266,31 @@ def add_marker(lat, lng, title, info=None, icon=None):
         logger.error(f"Error adding marker: {str(e)}", exc_info=True)
         return False
 
+def add_markers(markers):
+    """Add several markers (dicts of add_marker arguments) in one JavaScript call"""
+    try:
+        logger.info(f"Adding {len(markers)} markers")
+        markers_json = json.dumps([
+            {
+                "lat": marker["lat"],
+                "lng": marker["lng"],
+                "title": marker["title"],
+                "info": marker.get("info"),
+                "icon": marker.get("icon")
+            }
+            for marker in markers
+        ])
+        streamlit_js_eval(js_expressions=_MARKERS_TPL.substitute(markers=markers_json))
+        logger.info(f"{len(markers)} markers added successfully")
+        return True
+    except Exception as e:
+        logger.error(f"Error adding markers: {str(e)}", exc_info=True)
+        return False
+
 def center_map(lat, lng, zoom=13):
     """Center the map on specific coordinates"""
     try:
-        center_js = f"""
-        try {{
-            window.map.setCenter({{ lat: {lat}, lng: {lng} }});
-            window.map.setZoom({zoom});
-        }} catch (error) {{
-            console.error('Error centering map:', error);
-        }}
-        """
+        center_js = _CENTER_TPL.substitute(lat=lat, lng=lng, zoom=zoom)
         streamlit_js_eval(js_expressions=center_js)
         return True
     except Exception as e:
@@ -147,59 +300,32 @@ def center_map(lat, lng, zoom=13):
 def draw_route(origin_lat, origin_lng, dest_lat, dest_lng):
     """Draw a route between two points"""
     try:
-        route_js = f"""
-        try {{
-            if (!window.directionsService) {{
-                window.directionsService = new google.maps.DirectionsService();
-            }}
-            const directionsRenderer = new google.maps.DirectionsRenderer({{
-                map: window.map,
-                suppressMarkers: true,
-                polylineOptions: {{
-                    strokeColor: '#2196F3',
-                    strokeWeight: 4
-                }}
-            }});
-
-            const request = {{
-                origin: {{ lat: {origin_lat}, lng: {origin_lng} }},
-                destination: {{ lat: {dest_lat}, lng: {dest_lng} }},
-                travelMode: google.maps.TravelMode.DRIVING
-            }};
-
-            window.directionsService.route(request, (response, status) => {{
-                if (status === "OK") {{
-                    directionsRenderer.setDirections(response);
-                }} else {{
-                    console.error('Directions request failed:', status);
-                }}
-            }});
-        }} catch (error) {{
-            console.error('Error drawing route:', error);
-        }}
-        """
+        route_js = _ROUTE_TPL.substitute(
+            origin_lat=origin_lat,
+            origin_lng=origin_lng,
+            dest_lat=dest_lat,
+            dest_lng=dest_lng
+        )
         streamlit_js_eval(js_expressions=route_js)
         return True
     except Exception as e:
         logger.error(f"Error drawing route: {e}")
         return False
 
+def draw_routes(routes):
+    """Draw several routes, given as (origin_lat, origin_lng, dest_lat, dest_lng), in one JavaScript call"""
+    try:
+        routes_json = json.dumps([list(route) for route in routes])
+        streamlit_js_eval(js_expressions=_ROUTES_TPL.substitute(routes=routes_json))
+        return True
+    except Exception as e:
+        logger.error(f"Error drawing routes: {e}")
+        return False
+
 def clear_routes():
     """Clear all routes from the map"""
     try:
-        clear_js = """
-        try {
-            if (window.map) {
-                const directionsRenderer = new google.maps.DirectionsRenderer({
-                    map: window.map
-                });
-                directionsRenderer.setMap(null);
-            }
-        } catch (error) {
-            console.error('Error clearing routes:', error);
-        }
-        """
-        streamlit_js_eval(js_expressions=clear_js)
+        streamlit_js_eval(js_expressions=_CLEAR_ROUTES_JS)
         return True
     except Exception as e:
         logger.error(f"Error clearing routes: {e}")
@@ -209,22 +335,7 @@ def add_heat_map(locations, weights=None):
     """Add a heat map layer to the map"""
     try:
         locations_str = json.dumps([{"lat": lat, "lng": lng} for lat, lng in locations])
-        heat_map_js = f"""
-        try {{
-            const heatmapData = {locations_str}.map(location => {{
-                return new google.maps.LatLng(location.lat, location.lng);
-            }});
-
-            const heatmap = new google.maps.visualization.HeatmapLayer({{
-                data: heatmapData,
-                map: window.map,
-                radius: 50,
-                opacity: 0.6
-            }});
-        }} catch (error) {{
-            console.error('Error creating heat map:', error);
-        }}
-        """
+        heat_map_js = _HEAT_MAP_TPL.substitute(locations=locations_str)
         streamlit_js_eval(js_expressions=heat_map_js)
         return True
     except Exception as e:
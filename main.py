@@ -5,23 +5,27 @@ import pandas as pd
 import numpy as np
 import json
 import os
+import hashlib
+import hmac
+import time
 from pathlib import Path
 import socketio
 import queue
 import threading
+from collections import deque
+from itertools import islice
 from datetime import datetime, timedelta
-from math import radians, sin, cos, sqrt, atan2
+from math import radians, cos
 import bcrypt
 from twilio.rest import Client
 import secrets
-import random
 from pantry_data import PantryDataManager
 from diagnostic_report import DiagnosticReport
 from password_reset import PasswordResetManager
 import logging
 from google_maps_integration import (
-    init_google_maps, add_marker, center_map, 
-    draw_route, clear_routes, add_heat_map
+    init_google_maps, add_marker, add_markers, center_map,
+    draw_routes, clear_routes, add_heat_map
 )
 
 # Configure logging
@@ -40,16 +44,30 @@ class IoTSimulator:
     def __init__(self):
         self.last_update = datetime.now()
         self.update_interval = timedelta(seconds=30)
+        self._rng = np.random.default_rng()
+        self._last_maintenance_date = None
+        self._last_maintenance_iso = None
+
+    def _last_maintenance(self, now):
+        # Maintenance history only moves on when the day changes
+        if self._last_maintenance_date != now.date():
+            self._last_maintenance_date = now.date()
+            days_ago = 1 + int(self._rng.integers(0, 30))
+            self._last_maintenance_iso = (now - timedelta(days=days_ago)).isoformat()
+        return self._last_maintenance_iso
 
     def get_sensor_data(self):
-        if datetime.now() - self.last_update >= self.update_interval:
-            self.last_update = datetime.now()
+        now = datetime.now()
+        if now - self.last_update >= self.update_interval:
+            self.last_update = now
+            # One draw per reading: temperature, humidity, door, power
+            u = self._rng.random(4)
             return {
-                'temperature': random.uniform(18.0, 24.0),
-                'humidity': random.uniform(40.0, 60.0),
-                'door_status': random.choice(['closed', 'open']),
-                'power_status': random.choice(['normal', 'backup']),
-                'last_maintenance': (datetime.now() - timedelta(days=random.randint(1, 30))).isoformat()
+                'temperature': 18.0 + 6.0 * u[0],
+                'humidity': 40.0 + 20.0 * u[1],
+                'door_status': 'closed' if u[2] < 0.5 else 'open',
+                'power_status': 'normal' if u[3] < 0.5 else 'backup',
+                'last_maintenance': self._last_maintenance(now)
             }
         return None
 
@@ -57,75 +75,201 @@ class IoTSimulator:
 data_dir = Path("data")
 data_dir.mkdir(exist_ok=True)
 
-# Function to calculate distance between two points using Haversine formula
-def calculate_distance(lat1, lon1, lat2, lon2):
+# Function to cache pantry names and coordinates as contiguous arrays
+def _ensure_pantry_soa():
+    version = st.session_state.pantry_manager.version
+    soa = st.session_state.get('pantry_soa')
+    if soa is None or soa['version'] != version:
+        locations = st.session_state.pantry_manager.get_all_locations()
+        if locations.empty:
+            locations = pd.DataFrame(columns=['name', 'lat', 'lon'])
+        soa = {
+            'version': version,
+            'lats': locations['lat'].to_numpy(np.float64),
+            'lons': locations['lon'].to_numpy(np.float64),
+            'names': locations['name'].to_numpy(object)
+        }
+        st.session_state.pantry_soa = soa
+    return soa['lats'], soa['lons'], soa['names']
+
+# Function to find nearest pantries
+def find_nearest_pantries(user_lat, user_lon, pantry_lats, pantry_lons, pantry_names, max_distance=10):
+    if len(pantry_lats) == 0:
+        return []
+
     R = 6371  # Earth's radius in kilometers
 
-    lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
+    user_lat_rad, user_lon_rad = radians(user_lat), radians(user_lon)
 
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1-a))
-    distance = R * c
+    # Cheap lat/lon window (~111 km per degree) that holds every pantry
+    # within max_distance, so only those candidates pay for the trig
+    dlat_max = max_distance / 111.0
+    dlon_max = max_distance / (111.0 * max(cos(user_lat_rad), 1e-6))
+    candidates = np.flatnonzero(
+        (np.abs(pantry_lats - user_lat) <= dlat_max) &
+        (np.abs(pantry_lons - user_lon) <= dlon_max)
+    )
 
-    return distance
+    # Haversine distance from the user to every candidate at once
+    lats = np.radians(pantry_lats[candidates])
+    dlat = lats - user_lat_rad
+    dlon = np.radians(pantry_lons[candidates]) - user_lon_rad
 
-# Function to find nearest pantries
-def find_nearest_pantries(user_lat, user_lon, pantries_df, max_distance=10):
+    a = np.sin(dlat/2)**2 + cos(user_lat_rad) * np.cos(lats) * np.sin(dlon/2)**2
+    dist = 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+    # Only pantries within the max distance, nearest first
+    keep = dist <= max_distance
+    within, dist = candidates[keep], dist[keep]
+    order = np.argsort(dist, kind='stable')
+
+    statuses = st.session_state.pantry_manager.get_all_statuses()
     distances = []
-    for _, pantry in pantries_df.iterrows():
+    for i, pantry_dist in zip(within[order], dist[order]):
         try:
-            dist = calculate_distance(user_lat, user_lon, pantry['lat'], pantry['lon'])
-            status = st.session_state.pantry_manager.get_pantry_status(pantry['name'])
-
-            # Only add pantries within the max distance
-            if dist <= max_distance:
-                distances.append({
-                    'name': pantry['name'],
-                    'distance': dist,
-                    'status': 'Open' if status and status['is_open'] else 'Closed',
-                    'lat': pantry['lat'],
-                    'lon': pantry['lon'],
-                    'inventory_percentage': status['inventory_percentage'] if status else 0
-                })
+            status = statuses.get(pantry_names[i])
+            distances.append({
+                'name': pantry_names[i],
+                'distance': float(pantry_dist),
+                'status': 'Open' if status and status['is_open'] else 'Closed',
+                'lat': float(pantry_lats[i]),
+                'lon': float(pantry_lons[i]),
+                'inventory_percentage': status['inventory_percentage'] if status else 0
+            })
         except Exception as e:
-            logger.error(f"Error processing pantry {pantry['name']}: {e}")
+            logger.error(f"Error processing pantry {pantry_names[i]}: {e}")
             continue
 
-    return sorted(distances, key=lambda x: x['distance'])
+    return distances
+
+# Parse a local storage file; the mtime argument keys the cache so edits are picked up
+@st.cache_data(max_entries=32, show_spinner=False)
+def _load_local_data(path, mtime):
+    with open(path, 'r') as f:
+        data = pd.DataFrame(json.load(f))
+        # Convert date strings back to datetime objects if 'last_donation' column exists
+        if 'last_donation' in data.columns:
+            data['last_donation'] = pd.to_datetime(data['last_donation'])
+        return data
 
 # Function to load data from local storage
 def load_local_data(filename, default_data):
+    path = data_dir / filename
     try:
-        with open(data_dir / filename, 'r') as f:
-            data = pd.DataFrame(json.load(f))
-            # Convert date strings back to datetime objects if 'last_donation' column exists
-            if 'last_donation' in data.columns:
-                data['last_donation'] = pd.to_datetime(data['last_donation'])
-            return data
+        return _load_local_data(str(path), path.stat().st_mtime)
     except (FileNotFoundError, json.JSONDecodeError):
         return default_data
 
+# Function to store inventory columns in compact dtypes
+def optimize_inventory_dtypes(inventory):
+    for col in ('quantity', 'capacity', 'min_threshold'):
+        inventory[col] = pd.to_numeric(inventory[col], downcast='integer')
+    for col in ('temperature', 'humidity'):
+        inventory[col] = inventory[col].astype('float32')
+    # Low-cardinality labels compare and group on integer codes
+    for col in ('category', 'storage_condition'):
+        inventory[col] = inventory[col].astype('category')
+    # Parse expiry dates once so renders don't re-parse them per item
+    # Blank or malformed expiry dates become NaT and a missing day count
+    inventory['expiry_date'] = pd.to_datetime(inventory['expiry_date'], format='ISO8601', errors='coerce')
+    inventory['days_until_expiry'] = (
+        inventory['expiry_date'] - pd.Timestamp.now()
+    ).dt.days.astype('Int32')
+    return inventory
+
+# Function to store donor badge levels as a categorical column
+def optimize_donor_dtypes(donors):
+    donors['badge_level'] = donors['badge_level'].astype('category')
+    return donors
+
 # Function to save data to local storage
 def save_local_data(data, filename):
-    # Convert DataFrame to records with timestamp handling
+    # Let pandas serialize DataFrames, writing timestamps as ISO strings
     if isinstance(data, pd.DataFrame):
-        records = []
-        for record in data.to_dict('records'):
-            # Convert any Timestamp objects to ISO format strings
-            processed_record = {}
-            for key, value in record.items():
-                if isinstance(value, pd.Timestamp):
-                    processed_record[key] = value.isoformat()
-                else:
-                    processed_record[key] = value
-            records.append(processed_record)
-    else:
-        records = data
+        data.to_json(data_dir / filename, orient='records', date_format='iso', date_unit='us')
+        return
 
     with open(data_dir / filename, 'w') as f:
-        json.dump(records, f)
+        json.dump(data, f)
+
+# Function to index users by username and email; call again whenever users gains or loses rows
+def index_users():
+    users = st.session_state.users
+    st.session_state.users_by_username = dict(zip(users['username'], users.index))
+    st.session_state.users_by_email = dict(zip(users['email'], users.index))
+
+# Function to flag a session store for saving at the end of the rerun
+def mark_dirty(store):
+    st.session_state.dirty[store] = True
+
+# Process-wide managers shared by every session
+@st.cache_resource
+def get_pantry_manager():
+    return PantryDataManager()
+
+@st.cache_resource
+def get_password_reset_manager():
+    return PasswordResetManager()
+
+# How long a successful login check is remembered, in seconds
+_LOGIN_CACHE_TTL = 300
+
+# Verify a login password; successful checks are remembered briefly for this session so reruns skip bcrypt
+def _verify_pw(username, password, stored_hash):
+    # Hashes reloaded from users.json come back as str rather than bytes
+    if isinstance(stored_hash, str):
+        stored_hash = stored_hash.encode('utf-8')
+
+    # Keyed on the user and stored hash; the value is a keyed digest of the
+    # password, so the plaintext is never kept
+    key = (username, hashlib.sha256(stored_hash).hexdigest())
+    proof = hmac.new(st.session_state.login_digest_key, password.encode('utf-8'), hashlib.sha256).digest()
+    verified = st.session_state.verified_logins.get(key)
+    if verified is not None:
+        verified_proof, expires_at = verified
+        if time.time() >= expires_at:
+            del st.session_state.verified_logins[key]
+        elif hmac.compare_digest(verified_proof, proof):
+            return True
+
+    if not bcrypt.checkpw(password.encode('utf-8'), stored_hash):
+        return False
+    st.session_state.verified_logins[key] = (proof, time.time() + _LOGIN_CACHE_TTL)
+    return True
+
+# Synthetic inventory history, regenerated once per day
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_historical(today):
+    dates = pd.date_range(start='2024-01-01', end=today, freq='D')
+    return pd.DataFrame({
+        'date': dates,
+        'rice_qty': 100 + np.random.normal(0, 10, len(dates)),
+        'beans_qty': 80 + np.random.normal(0, 8, len(dates)),
+        'pasta_qty': 120 + np.random.normal(0, 12, len(dates))
+    })
+
+# Shared figure object; cache_resource hands it back without a pickle round-trip
+@st.cache_resource(ttl=3600, show_spinner=False)
+def build_trends_fig(today):
+    historical_data = build_historical(today)
+
+    fig = go.Figure()
+    for item in ['rice_qty', 'beans_qty', 'pasta_qty']:
+        fig.add_trace(go.Scatter(
+            x=historical_data['date'],
+            y=historical_data[item],
+            name=item.replace('_qty', '').title(),
+            mode='lines'
+        ))
+
+    fig.update_layout(
+        height=400,
+        margin=dict(l=0, r=0, t=30, b=0),
+        xaxis_title="Date",
+        yaxis_title="Quantity",
+        legend_title="Items"
+    )
+    return fig
 
 # Page configuration
 st.set_page_config(
@@ -140,6 +284,10 @@ if 'is_online' not in st.session_state:
 if 'pending_updates' not in st.session_state:
     st.session_state.pending_updates = []
 
+# Stores changed during this session that still need saving
+if 'dirty' not in st.session_state:
+    st.session_state.dirty = {}
+
 # Initialize session state for IoT simulation with local storage
 if 'last_update' not in st.session_state:
     st.session_state.last_update = datetime.now()
@@ -159,9 +307,14 @@ if 'users' not in st.session_state:
         'activity_visibility', 'data_sharing'
     ])
     save_local_data(st.session_state.users, 'users.json')
-
-if 'password_reset_manager' not in st.session_state:
-    st.session_state.password_reset_manager = PasswordResetManager()
+if 'users_by_username' not in st.session_state:
+    index_users()
+# Successful login checks for this session only; failed checks are never stored
+if 'verified_logins' not in st.session_state:
+    st.session_state.verified_logins = {}
+    st.session_state.login_digest_key = secrets.token_bytes(32)
+
+st.session_state.password_reset_manager = get_password_reset_manager()
 if 'password_reset_stage' not in st.session_state:
     st.session_state.password_reset_stage = 'initial'
 if 'reset_email' not in st.session_state:
@@ -169,59 +322,77 @@ if 'reset_email' not in st.session_state:
 
 
 # Update the inventory data structure
-default_inventory = pd.DataFrame({
-    'item_id': range(1, 11),
-    'name': ['Rice', 'Beans', 'Pasta', 'Canned Soup', 'Cereal', 
-             'Fresh Vegetables', 'Bread', 'Milk', 'Baby Formula', 'Personal Hygiene Kit'],
-    'category': ['Grains', 'Proteins', 'Grains', 'Canned Goods', 'Breakfast', 
-                'Produce', 'Bakery', 'Dairy', 'Baby Care', 'Hygiene'],
-    'quantity': [100, 80, 120, 50, 75, 30, 45, 60, 25, 40],
-    'capacity': [150, 100, 150, 100, 100, 50, 60, 80, 40, 60],
-    'min_threshold': [30, 20, 30, 20, 25, 10, 15, 20, 10, 15],
-    'expiry_date': [(datetime.now() + timedelta(days=x)).isoformat() for x in [365, 365, 365, 730, 180, 7, 3, 14, 180, 365]],
-    'temperature': [20.0] * 10,
-    'humidity': [45.0] * 10,
-    'storage_condition': ['room_temp', 'room_temp', 'room_temp', 'room_temp', 'room_temp',
-                         'refrigerated', 'room_temp', 'refrigerated', 'room_temp', 'room_temp']
-})
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_default_inventory():
+    return pd.DataFrame({
+        'item_id': range(1, 11),
+        'name': ['Rice', 'Beans', 'Pasta', 'Canned Soup', 'Cereal', 
+                 'Fresh Vegetables', 'Bread', 'Milk', 'Baby Formula', 'Personal Hygiene Kit'],
+        'category': ['Grains', 'Proteins', 'Grains', 'Canned Goods', 'Breakfast', 
+                    'Produce', 'Bakery', 'Dairy', 'Baby Care', 'Hygiene'],
+        'quantity': [100, 80, 120, 50, 75, 30, 45, 60, 25, 40],
+        'capacity': [150, 100, 150, 100, 100, 50, 60, 80, 40, 60],
+        'min_threshold': [30, 20, 30, 20, 25, 10, 15, 20, 10, 15],
+        'expiry_date': [(datetime.now() + timedelta(days=x)).isoformat() for x in [365, 365, 365, 730, 180, 7, 3, 14, 180, 365]],
+        'temperature': [20.0] * 10,
+        'humidity': [45.0] * 10,
+        'storage_condition': ['room_temp', 'room_temp', 'room_temp', 'room_temp', 'room_temp',
+                             'refrigerated', 'room_temp', 'refrigerated', 'room_temp', 'room_temp']
+    })
 
 # Load inventory from local storage or use default
 if 'inventory' not in st.session_state:
+    default_inventory = build_default_inventory()
     try:
         loaded_inventory = load_local_data('inventory.json', default_inventory)
         # Ensure all required columns are present
         for col in default_inventory.columns:
             if col not in loaded_inventory.columns:
                 loaded_inventory[col] = default_inventory[col]
-        st.session_state.inventory = loaded_inventory
+        st.session_state.inventory = optimize_inventory_dtypes(loaded_inventory)
+        # Never write the defaults over an inventory file that failed to parse
+        if loaded_inventory is not default_inventory or not (data_dir / 'inventory.json').exists():
+            mark_dirty('inventory')
     except Exception as e:
         st.error(f"Error loading inventory: {e}")
-        st.session_state.inventory = default_inventory
+        st.session_state.inventory = optimize_inventory_dtypes(default_inventory)
 
 # Initialize PantryDataManager in session state
-if 'pantry_manager' not in st.session_state:
-    st.session_state.pantry_manager = PantryDataManager()
+st.session_state.pantry_manager = get_pantry_manager()
 
 # Update the pantry locations section
-st.session_state.pantry_locations = st.session_state.pantry_manager.get_all_locations()
+if 'pantry_locations' not in st.session_state:
+    st.session_state.pantry_locations = st.session_state.pantry_manager.get_all_locations()
+    # Names for the preferred pantry picker and their positions in it
+    st.session_state.pantry_names = list(st.session_state.pantry_locations.get('name', []))
+    st.session_state.pantry_name_positions = {
+        name: i for i, name in enumerate(st.session_state.pantry_names)
+    }
+    mark_dirty('pantry_locations')
 
 # Default donor data
-default_donors = pd.DataFrame({
-    'donor_id': range(1, 8),
-    'name': ['John Smith', 'Sarah Johnson', 'Bay Area Foods Co.', 'Community Kitchen', 
-            'Local Grocery Store', 'Michael Chang', 'Emma Wilson'],
-    'total_donations': [1500, 850, 3200, 2100, 1800, 650, 950],
-    'donation_frequency': [12, 8, 24, 15, 20, 5, 9],
-    'last_donation': pd.date_range(end=datetime.now(), periods=7, freq='D'),
-    'badge_level': ['Gold', 'Silver', 'Platinum', 'Gold', 'Gold', 'Bronze', 'Silver']
-})
+@st.cache_data(ttl=3600, show_spinner=False)
+def build_default_donors():
+    return pd.DataFrame({
+        'donor_id': range(1, 8),
+        'name': ['John Smith', 'Sarah Johnson', 'Bay Area Foods Co.', 'Community Kitchen', 
+                'Local Grocery Store', 'Michael Chang', 'Emma Wilson'],
+        'total_donations': [1500, 850, 3200, 2100, 1800, 650, 950],
+        'donation_frequency': [12, 8, 24, 15, 20, 5, 9],
+        'last_donation': pd.date_range(end=datetime.now(), periods=7, freq='D'),
+        'badge_level': ['Gold', 'Silver', 'Platinum', 'Gold', 'Gold', 'Bronze', 'Silver']
+    })
 
 # Load donors from local storage or use default
 if 'donors' not in st.session_state:
-    st.session_state.donors = load_local_data('donors.json', default_donors)
+    st.session_state.donors = optimize_donor_dtypes(
+        load_local_data('donors.json', build_default_donors())
+    )
+    mark_dirty('donors')
 
-# Connection status in sidebar
-with st.sidebar:
+# Connection status in sidebar; a fragment so its own buttons rerun only the panel
+@st.fragment
+def render_connection_status():
     st.header("Connection Status")
     connection_status = "🟢 Online" if st.session_state.is_online else "🔴 Offline"
     st.markdown(f"### {connection_status}")
@@ -245,7 +416,7 @@ with st.sidebar:
             save_local_data(st.session_state.donors, 'donors.json')
             st.session_state.pending_updates = []
             st.success("✅ All updates synchronized!")
-            st.rerun()
+            st.rerun(scope="fragment")
         except Exception as e:
             st.error(f"❌ Sync failed: {str(e)}")
 
@@ -253,15 +424,21 @@ with st.sidebar:
         st.markdown(f"### 👤 Welcome, {st.session_state.current_user['username']}")
         if st.button("Logout"):
             st.session_state.current_user = None
+            st.session_state.verified_logins.clear()
             st.rerun()
 
+with st.sidebar:
+    render_connection_status()
+
 
 # Header
 st.title("🥫 Smart Community Pantry Management")
 
-# Initialize chat history in session state
+# Initialize chat history in session state, keeping only the newest messages
+CHAT_HISTORY_LIMIT = 200
+CHAT_RENDER_LIMIT = 50
 if 'chat_history' not in st.session_state:
-    st.session_state.chat_history = []
+    st.session_state.chat_history = deque(maxlen=CHAT_HISTORY_LIMIT)
 if 'chat_queue' not in st.session_state:
     st.session_state.chat_queue = queue.Queue()
 if 'last_message_time' not in st.session_state:
@@ -277,6 +454,9 @@ tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
 
 with tab1:
     st.subheader("Community Pantry Locations")
+    if st.button("Refresh pantry list"):
+        del st.session_state['pantry_locations']
+        st.rerun()
     # Placeholder for Google Map integration in future update.
     st.write("Google Map will be displayed here.")
 
@@ -287,12 +467,10 @@ with tab2:
         st.subheader("Inventory Status")
 
         # Group items by category
-        categories = st.session_state.inventory['category'].unique()
-        for category in categories:
+        for category, category_items in st.session_state.inventory.groupby(
+            'category', sort=False, observed=True
+        ):
             st.markdown(f"### {category}")
-            category_items = st.session_state.inventory[
-                st.session_state.inventory['category'] == category
-            ]
 
             for _, item in category_items.iterrows():
                 with st.container():
@@ -307,9 +485,8 @@ with tab2:
                         st.metric("Quantity", f"{item['quantity']}/{item['capacity']}")
 
                     with col_c:
-                        expiry = pd.to_datetime(item['expiry_date'])
-                        days_until_expiry = (expiry - pd.Timestamp.now()).days
-                        st.metric("Expires In", f"{days_until_expiry} days")
+                        days_left = item['days_until_expiry']
+                        st.metric("Expires In", "—" if pd.isna(days_left) else f"{days_left} days")
 
                     sensor_col1, sensor_col2, sensor_col3 = st.columns(3)
                     with sensor_col1:
@@ -333,64 +510,43 @@ with tab2:
             st.markdown(f"Last Maintenance: {pd.to_datetime(sensor_data['last_maintenance']).strftime('%Y-%m-%d')}")
             st.markdown("---")
 
-        # Alerts
-        alert_count = 0
-        for _, item in st.session_state.inventory.iterrows():
-            # Low stock alert
-            if item['quantity'] <= item['min_threshold']:
-                st.error(f"⚠️ Low Stock Alert: {item['name']} is below minimum threshold ({item['quantity']} units remaining)")
-                alert_count += 1
-
-            # Temperature alert
-            if item['storage_condition'] == 'room_temp' and (item['temperature'] < 18 or item['temperature'] > 24):
-                st.error(f"🌡️ Temperature Alert: {item['name']} storage temperature is outside safe range ({item['temperature']:.1f}°C)")
-                alert_count += 1
-            elif item['storage_condition'] == 'refrigerated' and (item['temperature'] < 2 or item['temperature'] > 6):
-                st.error(f"❄️ Refrigeration Alert: {item['name']} temperature is outside safe range ({item['temperature']:.1f}°C)")
-                alert_count += 1
-
-            # Humidity alert
-            if item['humidity'] < 40 or item['humidity'] > 60:
-                st.warning(f"💧 Humidity Alert: {item['name']} storage humidity is outside safe range ({item['humidity']:.1f}%)")
-                alert_count += 1
-
-            # Expiry alert
-            expiry = pd.to_datetime(item['expiry_date'])
-            days_until_expiry = (expiry - pd.Timestamp.now()).days
-            if days_until_expiry <= 7:
-                st.error(f"📅 Expiry Alert: {item['name']} will expire in {days_until_expiry} days")
-                alert_count += 1
+        # Alerts, evaluated for all items at once
+        inventory = st.session_state.inventory
+        temperature = inventory['temperature']
+        humidity = inventory['humidity']
+        days_until_expiry = inventory['days_until_expiry']
+        alert_flags = pd.DataFrame({
+            'low_stock': inventory['quantity'] <= inventory['min_threshold'],
+            'temperature': (inventory['storage_condition'] == 'room_temp') & ((temperature < 18) | (temperature > 24)),
+            'refrigeration': (inventory['storage_condition'] == 'refrigerated') & ((temperature < 2) | (temperature > 6)),
+            'humidity': (humidity < 40) | (humidity > 60),
+            'expiry': (days_until_expiry <= 7).fillna(False)
+        })
+        alert_count = int(alert_flags.to_numpy().sum())
+
+        flagged = alert_flags.any(axis=1)
+        for item, flags, days in zip(
+            inventory[flagged].itertuples(index=False),
+            alert_flags[flagged].itertuples(index=False),
+            days_until_expiry[flagged]
+        ):
+            if flags.low_stock:
+                st.error(f"⚠️ Low Stock Alert: {item.name} is below minimum threshold ({item.quantity} units remaining)")
+            if flags.temperature:
+                st.error(f"🌡️ Temperature Alert: {item.name} storage temperature is outside safe range ({item.temperature:.1f}°C)")
+            elif flags.refrigeration:
+                st.error(f"❄️ Refrigeration Alert: {item.name} temperature is outside safe range ({item.temperature:.1f}°C)")
+            if flags.humidity:
+                st.warning(f"💧 Humidity Alert: {item.name} storage humidity is outside safe range ({item.humidity:.1f}%)")
+            if flags.expiry:
+                st.error(f"📅 Expiry Alert: {item.name} will expire in {days} days")
 
         if alert_count == 0:
             st.success("✅ All systems normal. No alerts at this time.")
 
 with tab3:
     st.subheader("Inventory Trends")
-    dates = pd.date_range(start='2024-01-01', end=datetime.now(), freq='D')
-    historical_data = pd.DataFrame({
-        'date': dates,
-        'rice_qty': 100 + np.random.normal(0, 10, len(dates)),
-        'beans_qty': 80 + np.random.normal(0, 8, len(dates)),
-        'pasta_qty': 120 + np.random.normal(0, 12, len(dates))
-    })
-
-    fig = go.Figure()
-    for item in ['rice_qty', 'beans_qty', 'pasta_qty']:
-        fig.add_trace(go.Scatter(
-            x=historical_data['date'],
-            y=historical_data[item],
-            name=item.replace('_qty', '').title(),
-            mode='lines'
-        ))
-
-    fig.update_layout(
-        height=400,
-        margin=dict(l=0, r=0, t=30, b=0),
-        xaxis_title="Date",
-        yaxis_title="Quantity",
-        legend_title="Items"
-    )
-    st.plotly_chart(fig, use_container_width=True)
+    st.plotly_chart(build_trends_fig(datetime.now().date()), use_container_width=True)
 
 with tab4:
     st.subheader("🏆 Community Donor Leaderboard")
@@ -444,34 +600,40 @@ with tab4:
     """)
 
     sorted_donors = st.session_state.donors.sort_values('total_donations', ascending=False)
+    badge_emoji = {
+        'Platinum': '🏆',
+        'Gold': '🥇',
+        'Silver': '🥈',
+        'Bronze': '🥉'
+    }
+
+    # Format the display columns once for the whole leaderboard
+    leaderboard = pd.DataFrame({
+        'name': sorted_donors['name'],
+        'emoji': sorted_donors['badge_level'].map(badge_emoji).astype(str),
+        # Handle both datetime objects and strings
+        'last_donation': pd.to_datetime(sorted_donors['last_donation']).dt.strftime('%Y-%m-%d'),
+        'total_donations': sorted_donors['total_donations'],
+        'donation_frequency': sorted_donors['donation_frequency']
+    })
 
     st.markdown("### Top Contributors")
-    for idx, donor in sorted_donors.iterrows():
+    for donor in leaderboard.itertuples(index=False):
         with st.container():
             col1, col2, col3, col4 = st.columns([3, 2, 1, 1])
-            badge_emoji = {
-                'Platinum': '🏆',
-                'Gold': '🥇',
-                'Silver': '🥈',
-                'Bronze': '🥉'
-            }
 
             with col1:
-                st.markdown(f"#### {badge_emoji[donor['badge_level']]} {donor['name']}")
-                # Handle both datetime objects and strings
-                donation_date = donor['last_donation']
-                if isinstance(donation_date, str):
-                    donation_date = pd.to_datetime(donation_date)
-                st.caption(f"Last donation: {donation_date.strftime('%Y-%m-%d')}")
+                st.markdown(f"#### {donor.emoji} {donor.name}")
+                st.caption(f"Last donation: {donor.last_donation}")
 
             with col2:
-                st.metric("Total Donations", f"{donor['total_donations']} items")
+                st.metric("Total Donations", f"{donor.total_donations} items")
 
             with col3:
-                st.metric("Frequency", f"{donor['donation_frequency']} times")
+                st.metric("Frequency", f"{donor.donation_frequency} times")
 
             with col4:
-                share_text = f"Congratulations to {donor['name']} for earning {badge_emoji[donor['badge_level']]} badge with {donor['total_donations']} donations! #CommunityHeroes"
+                share_text = f"Congratulations to {donor.name} for earning {donor.emoji} badge with {donor.total_donations} donations! #CommunityHeroes"
                 tweet_url = f"https://twitter.com/intent/tweet?text={share_text}"
                 st.markdown(f"[🎉 Celebrate]({tweet_url})")
 
@@ -515,6 +677,7 @@ with tab5:
             while not st.session_state.chat_queue.empty():
                 pending_msg = st.session_state.chat_queue.get()
                 st.session_state.chat_history.append(pending_msg)
+            mark_dirty('chat_history')
 
     # Handle new message
     if send_button and user_message:
@@ -527,6 +690,7 @@ with tab5:
 
         if st.session_state.is_online:
             st.session_state.chat_history.append(new_message)
+            mark_dirty('chat_history')
             # Here you would implement the actual message sending to a backend
         else:
             st.session_state.chat_queue.put(new_message)
@@ -534,9 +698,10 @@ with tab5:
         # Clear input
         st.session_state.message_input = ""
 
-    # Display chat history
+    # Display the most recent chat history
     with chat_container:
-        for msg in st.session_state.chat_history:
+        chat_history = st.session_state.chat_history
+        for msg in islice(chat_history, max(len(chat_history) - CHAT_RENDER_LIMIT, 0), None):
             message_container = st.container()
 
             with message_container:
@@ -563,10 +728,13 @@ with tab5:
                 'status': 'sent'
             }
             st.session_state.chat_history.append(auto_response)
+            mark_dirty('chat_history')
             st.session_state.last_message_time = datetime.now()
             st.experimental_rerun()
 
-with tab6:
+# Resource matching reruns on its own so map searches skip the rest of the page
+@st.fragment
+def render_resource_matching():
     st.subheader("🎯 Resource Matching")
 
     try:
@@ -632,7 +800,7 @@ with tab6:
                 # Find and display nearby pantries
                 nearest_pantries = find_nearest_pantries(
                     user_lat, user_lon,
-                    st.session_state.pantry_locations,
+                    *_ensure_pantry_soa(),
                     max_distance
                 )
 
@@ -642,7 +810,8 @@ with tab6:
                     # Clear any existing routes
                     clear_routes()
 
-                    # Add pantry markers and routes
+                    # Collect pantry markers and routes for one map call each
+                    pantry_markers = []
                     for pantry in nearest_pantries:
                         # Create info window content
                         info_content = f"""
@@ -654,24 +823,23 @@ with tab6:
                         </div>
                         """
 
-                        # Add marker for each pantry
                         icon = "http://maps.google.com/mapfiles/ms/icons/green-dot.png" \
                                if pantry['status'] == 'Open' else \
                                "http://maps.google.com/mapfiles/ms/icons/red-dot.png"
 
-                        add_marker(
-                            pantry['lat'],
-                            pantry['lon'],
-                            pantry['name'],
-                            info_content,
-                            icon
-                        )
+                        pantry_markers.append({
+                            'lat': pantry['lat'],
+                            'lng': pantry['lon'],
+                            'title': pantry['name'],
+                            'info': info_content,
+                            'icon': icon
+                        })
 
-                        # Draw route to pantry
-                        draw_route(
-                            user_lat, user_lon,
-                            pantry['lat'], pantry['lon']
-                        )
+                    add_markers(pantry_markers)
+                    draw_routes([
+                        (user_lat, user_lon, pantry['lat'], pantry['lon'])
+                        for pantry in nearest_pantries
+                    ])
 
                     # Add heat map of pantry locations
                     locations = [(p['lat'], p['lon']) for p in nearest_pantries]
@@ -698,6 +866,9 @@ with tab6:
         else:
             st.info("Enter your location to find nearby pantries and available resources.")
 
+with tab6:
+    render_resource_matching()
+
 with tab7:
     if not st.session_state.current_user:
         st.subheader("👤 User Management")
@@ -712,15 +883,12 @@ with tab7:
             col1, col2 = st.columns(2)
             with col1:
                 if st.button("Login"):
-                    user_data = st.session_state.users[
-                        st.session_state.users['username'] == login_username
-                    ]
-
-                    if not user_data.empty:
-                        stored_hash = user_data.iloc[0]['password_hash']
-                        if bcrypt.checkpw(login_password.encode('utf-8'), 
-                                            stored_hash.encode('utf-8')):
-                            st.session_state.current_user = user_data.iloc[0].to_dict()
+                    user_idx = st.session_state.users_by_username.get(login_username)
+
+                    if user_idx is not None:
+                        user_data = st.session_state.users.loc[user_idx]
+                        if _verify_pw(login_username, login_password, user_data['password_hash']):
+                            st.session_state.current_user = user_data.to_dict()
                             st.success("Login successful!")
                             st.rerun()
                         else:
@@ -742,11 +910,7 @@ with tab7:
 
                     if st.button("Send Verification Code"):
                         logger.info(f"Attempting to send verification code to {reset_email}")
-                        user_data = st.session_state.users[
-                            st.session_state.users['email'] == reset_email
-                        ]
-
-                        if not user_data.empty:
+                        if reset_email in st.session_state.users_by_email:
                             # Generate and send verification code
                             code = st.session_state.password_reset_manager.generate_verification_code(reset_email)
                             if code and st.session_state.password_reset_manager.send_verification_email(reset_email, code):
@@ -793,9 +957,8 @@ with tab7:
     else:
         st.subheader("User Settings")
 
-        user_data = st.session_state.users[
-            st.session_state.users['username'] == st.session_state.current_user['username']
-        ].iloc[0]
+        user_idx = st.session_state.users_by_username[st.session_state.current_user['username']]
+        user_data = st.session_state.users.loc[user_idx]
 
         tab1, tab2 = st.tabs(["Profile Information", "Privacy Settings"])
 
@@ -809,10 +972,8 @@ with tab7:
                 st.markdown("### Preferred Pantry")
                 preferred_pantry = st.selectbox(
                     "Select your preferred pantry",
-                    st.session_state.pantry_locations['name'].tolist(),
-                    index=st.session_state.pantry_locations['name'].tolist().index(
-                        user_data['preferred_pantry']
-                    ) if user_data['preferred_pantry'] else 0
+                    st.session_state.pantry_names,
+                    index=st.session_state.pantry_name_positions.get(user_data['preferred_pantry'], 0)
                 )
 
         with tab2:
@@ -859,31 +1020,42 @@ with tab7:
 
         if st.button("Save Changes"):
             # Update user preferences and privacy settings
-            update_mask = st.session_state.users['username'] == user_data['username']
-            st.session_state.users.loc[update_mask, 'notifications_enabled'] = notifications
-            st.session_state.users.loc[update_mask, 'profile_visibility'] = profile_visibility
-            st.session_state.users.loc[update_mask, 'contact_sharing'] = contact_sharing
-            st.session_state.users.loc[update_mask, 'activity_visibility'] = activity_visibility
-            st.session_state.users.loc[update_mask, 'data_sharing'] = data_sharing
-
+            updates = {
+                'notifications_enabled': notifications,
+                'profile_visibility': profile_visibility,
+                'contact_sharing': contact_sharing,
+                'activity_visibility': activity_visibility,
+                'data_sharing': data_sharing
+            }
             if user_data['role'] == "Receiver":
-                st.session_state.users.loc[update_mask, 'preferred_pantry'] = preferred_pantry
-
-            # Save to local storage
-            save_local_data(st.session_state.users, 'users.json')
-            st.success("Settings updated successfully!")
+                updates['preferred_pantry'] = preferred_pantry
 
-# Save chat history to local storage
-if st.session_state.chat_history:
-    save_local_data(pd.DataFrame(st.session_state.chat_history), 'chat_history.json')
+            # One row write; an object Series keeps the list-valued settings intact
+            updates = pd.Series(updates, dtype=object)
+            st.session_state.users.loc[user_idx, updates.index] = updates
 
-# Save all data to local storage
-save_local_data(st.session_state.users, 'users.json')
-save_local_data(st.session_state.inventory, 'inventory.json')
-save_local_data(st.session_state.pantry_locations, 'pantry_locations.json')
-save_local_data(st.session_state.donors, 'donors.json')
+            # Save to local storage at the end of this rerun
+            mark_dirty('users')
+            st.success("Settings updated successfully!")
 
-with tab8:
+# Save changed data to local storage
+stores = {
+    'users': st.session_state.users,
+    'inventory': st.session_state.inventory,
+    'pantry_locations': st.session_state.pantry_locations,
+    'donors': st.session_state.donors,
+    'chat_history': st.session_state.chat_history
+}
+for store, data in stores.items():
+    if st.session_state.dirty.get(store):
+        if not isinstance(data, pd.DataFrame):
+            data = pd.DataFrame(data)
+        save_local_data(data, f'{store}.json')
+        st.session_state.dirty[store] = False
+
+# Diagnostics rerun on their own so report generation skips the rest of the page
+@st.fragment
+def render_diagnostics():
     st.subheader("🔧 System Diagnostics")
 
     # Check if user is admin
@@ -926,4 +1098,7 @@ with tab8:
     else:
         st.warning("⚠️ This section is only accessible to system administrators.")
         if not st.session_state.current_user:
-            st.info("Please log in with an administrator account to access the diagnostics.")
\ No newline at end of file
+            st.info("Please log in with an administrator account to access the diagnostics.")
+
+with tab8:
+    render_diagnostics()
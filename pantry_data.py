@@ -1,6 +1,8 @@
 import pandas as pd
+import numpy as np
 from datetime import datetime, time
 import json
+import os
 from pathlib import Path
 import logging
 
@@ -11,12 +13,25 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+REQUIRED_LOCATION_FIELDS = frozenset({
+    "name", "address", "lat", "lon", "operating_hours",
+    "services", "capacity", "current_inventory"
+})
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
 class PantryDataManager:
     def __init__(self):
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
         self.pantry_file = self.data_dir / "pantry_locations.json"
         self.data = None
+        # Bumped on every save so callers can invalidate derived caches
+        self.version = 0
+        # Derived from self.data and rebuilt whenever it changes
+        self._locations_df = None
+        self._locations_by_name = {}
+        self._open_intervals = [{} for _ in WEEKDAYS]
         self._initialize_data()
 
     def _initialize_data(self):
@@ -37,6 +52,29 @@ class PantryDataManager:
         except Exception as e:
             logger.error(f"Error initializing pantry data: {e}", exc_info=True)
             self._create_default_data()
+        self._index_locations()
+
+    def _index_locations(self):
+        """Reset the cached locations DataFrame and rebuild the name index"""
+        self._locations_df = None
+        locations = self.data.get("locations", []) if self.data else []
+        self._locations_by_name = {location["name"]: location for location in locations}
+        # Per weekday: pantry name -> (open, close) in minutes after midnight
+        self._open_intervals = [{} for _ in WEEKDAYS]
+        for location in locations:
+            for day, day_hours in location.get("operating_hours", {}).items():
+                try:
+                    self._open_intervals[WEEKDAYS.index(day)][location["name"]] = (
+                        self._minutes(day_hours["open"]),
+                        self._minutes(day_hours["close"])
+                    )
+                except Exception as e:
+                    logger.error(f"Error parsing operating hours for {day}: {e}")
+
+    def _minutes(self, hhmm):
+        """Convert an "HH:MM" string to minutes after midnight"""
+        hours, minutes = hhmm.split(":")
+        return int(hours) * 60 + int(minutes)
 
     def _validate_data_structure(self, data):
         """Validate the data structure"""
@@ -49,13 +87,10 @@ class PantryDataManager:
                 return False
 
             # Validate each location entry
-            for location in data["locations"]:
-                required_fields = ["name", "address", "lat", "lon", "operating_hours", 
-                                 "services", "capacity", "current_inventory"]
-                if not all(field in location for field in required_fields):
-                    return False
-
-            return True
+            return all(
+                isinstance(location, dict) and REQUIRED_LOCATION_FIELDS.issubset(location)
+                for location in data["locations"]
+            )
         except Exception as e:
             logger.error(f"Error validating data structure: {e}")
             return False
@@ -107,44 +142,78 @@ class PantryDataManager:
     def save_data(self):
         """Save pantry data to file"""
         try:
-            with open(self.pantry_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            self.version += 1
+            self._index_locations()
+            # Write to a temp file and swap it in so readers never see a partial file
+            tmp_file = self.pantry_file.with_suffix('.tmp')
+            tmp_file.write_text(json.dumps(self.data, indent=2))
+            os.replace(tmp_file, self.pantry_file)
             logger.info("Pantry data saved successfully")
         except Exception as e:
             logger.error(f"Error saving pantry data: {e}", exc_info=True)
 
     def get_all_locations(self):
-        """Return all pantry locations as a DataFrame"""
+        """Return all pantry locations as a DataFrame (shared, treat as read-only)"""
         try:
             if self.data and "locations" in self.data:
-                return pd.DataFrame(self.data["locations"])
+                if self._locations_df is None:
+                    self._locations_df = pd.DataFrame(self.data["locations"])
+                return self._locations_df
             logger.warning("No pantry locations data available")
             return pd.DataFrame()
         except Exception as e:
             logger.error(f"Error retrieving pantry locations: {e}", exc_info=True)
             return pd.DataFrame()
 
+    def _build_status(self, pantry, current_time):
+        """Build the status dict for a single pantry entry"""
+        return {
+            "is_open": self._is_open(pantry, current_time),
+            "current_inventory": pantry["current_inventory"],
+            "capacity": pantry["capacity"],
+            "inventory_percentage": (pantry["current_inventory"] / pantry["capacity"]) * 100,
+            "services": pantry["services"]
+        }
+
     def get_pantry_status(self, pantry_name):
         """Get current status of a specific pantry"""
         try:
             if not self.data or "locations" not in self.data:
                 return None
 
-            pantry = next((p for p in self.data["locations"] if p["name"] == pantry_name), None)
+            pantry = self._locations_by_name.get(pantry_name)
             if not pantry:
                 return None
 
-            return {
-                "is_open": self.is_pantry_open(pantry_name),
-                "current_inventory": pantry["current_inventory"],
-                "capacity": pantry["capacity"],
-                "inventory_percentage": (pantry["current_inventory"] / pantry["capacity"]) * 100,
-                "services": pantry["services"]
-            }
+            return self._build_status(pantry, datetime.now())
         except Exception as e:
             logger.error(f"Error getting pantry status: {e}", exc_info=True)
             return None
 
+    def get_all_statuses(self):
+        """Get the current status of every pantry, keyed by pantry name"""
+        try:
+            if not self.data or "locations" not in self.data:
+                return {}
+
+            current_time = datetime.now()
+            return {
+                pantry["name"]: self._build_status(pantry, current_time)
+                for pantry in self.data["locations"]
+            }
+        except Exception as e:
+            logger.error(f"Error getting pantry statuses: {e}", exc_info=True)
+            return {}
+
+    def _is_open(self, pantry, current_time):
+        """Check a pantry entry's operating hours against the given time"""
+        interval = self._open_intervals[current_time.weekday()].get(pantry["name"])
+        if interval is None:
+            return False
+
+        open_minutes, close_minutes = interval
+        return open_minutes <= current_time.hour * 60 + current_time.minute <= close_minutes
+
     def is_pantry_open(self, pantry_name, current_time=None):
         """Check if a pantry is currently open"""
         try:
@@ -154,59 +223,53 @@ class PantryDataManager:
             if not self.data or "locations" not in self.data:
                 return False
 
-            pantry = next((p for p in self.data["locations"] if p["name"] == pantry_name), None)
-            if not pantry or "operating_hours" not in pantry:
-                return False
-
-            day = current_time.strftime('%A').lower()
-            if day not in pantry["operating_hours"]:
+            pantry = self._locations_by_name.get(pantry_name)
+            if not pantry:
                 return False
 
-            hours = pantry["operating_hours"][day]
-            current_time = current_time.time()
-            open_time = datetime.strptime(hours["open"], "%H:%M").time()
-            close_time = datetime.strptime(hours["close"], "%H:%M").time()
-
-            return open_time <= current_time <= close_time
+            return self._is_open(pantry, current_time)
         except Exception as e:
             logger.error(f"Error checking pantry open status: {e}", exc_info=True)
             return False
 
-    def _calculate_distance(self, lat1, lon1, lat2, lon2):
-        from math import radians, sin, cos, sqrt, atan2
-
-        R = 6371  # Earth's radius in kilometers
+    def get_nearby_locations(self, lat, lon, max_distance_km=10):
+        """Return locations within max_distance_km as dicts with a distance, nearest first"""
+        if self.data is None or "locations" not in self.data:
+            return []
 
-        lat1, lon1, lat2, lon2 = map(radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        locations = self.data["locations"]
+        if not locations:
+            return []
 
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
+        R = 6371  # Earth's radius in kilometers
 
-        return R * c
+        # Haversine distance to every location at once
+        lat1, lon1 = np.radians(lat), np.radians(lon)
+        lats = np.radians(np.fromiter((location["lat"] for location in locations), np.float64, len(locations)))
+        lons = np.radians(np.fromiter((location["lon"] for location in locations), np.float64, len(locations)))
+        dlat = lats - lat1
+        dlon = lons - lon1
 
-    def get_nearby_locations(self, lat, lon, max_distance_km=10):
-        if self.data is None or "locations" not in self.data:
-            return pd.DataFrame()
+        a = np.sin(dlat/2)**2 + np.cos(lat1) * np.cos(lats) * np.sin(dlon/2)**2
+        distances = 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1-a))
 
-        locations = pd.DataFrame(self.data["locations"])
-        locations['distance'] = locations.apply(
-            lambda row: self._calculate_distance(lat, lon, row['lat'], row['lon']),
-            axis=1
-        )
-        return locations[locations['distance'] <= max_distance_km].sort_values('distance')
+        return [
+            locations[i] | {"distance": float(distances[i])}
+            for i in np.argsort(distances, kind='stable')
+            if distances[i] <= max_distance_km
+        ]
 
     def update_inventory(self, pantry_name, new_inventory):
         if self.data is None or "locations" not in self.data:
             return False
 
-        for location in self.data["locations"]:
-            if location["name"] == pantry_name:
-                location["current_inventory"] = new_inventory
-                self.save_data()
-                return True
-        return False
+        location = self._locations_by_name.get(pantry_name)
+        if location is None:
+            return False
+
+        location["current_inventory"] = new_inventory
+        self.save_data()
+        return True
 
     def get_service_descriptions(self):
         """Get descriptions of available services"""
@@ -1,11 +1,14 @@
 import os
+import hmac
 import secrets
+import time
 from datetime import datetime, timedelta
 import smtplib
 from email.mime.text import MIMEText
 import logging
 from pathlib import Path
 import json
+from concurrent.futures import ThreadPoolExecutor
 
 # Configure logging with more detailed format
 logging.basicConfig(
@@ -14,6 +17,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Background workers that deliver mail off the Streamlit script thread
+_mail_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="mail")
+
 class PasswordResetManager:
     def __init__(self):
         self.reset_tokens_file = Path("data/reset_tokens.json")
@@ -29,7 +35,7 @@ class PasswordResetManager:
         try:
             if self.reset_tokens_file.exists():
                 with open(self.reset_tokens_file, 'r') as f:
-                    return json.load(f)
+                    return self._migrate_expiries(json.load(f))
             logger.info("No existing tokens file found, creating new")
             return {}
         except Exception as e:
@@ -41,19 +47,31 @@ class PasswordResetManager:
         try:
             if self.verification_codes_file.exists():
                 with open(self.verification_codes_file, 'r') as f:
-                    return json.load(f)
+                    return self._migrate_expiries(json.load(f))
             logger.info("No existing verification codes file found, creating new")
             return {}
         except Exception as e:
             logger.error(f"Error loading verification codes: {e}")
             return {}
 
+    def _migrate_expiries(self, entries):
+        """Convert legacy ISO-format expiry strings to epoch seconds"""
+        for data in entries.values():
+            if isinstance(data.get('expiry'), str):
+                data['expiry'] = int(datetime.fromisoformat(data['expiry']).timestamp())
+        return entries
+
+    def _write_json(self, path, data):
+        """Write compact JSON atomically via a temp file and os.replace"""
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(data, separators=(',', ':')))
+        os.replace(tmp_path, path)
+
     def _save_tokens(self):
         """Save reset tokens to file"""
         try:
-            self.reset_tokens_file.parent.mkdir(exist_ok=True)
-            with open(self.reset_tokens_file, 'w') as f:
-                json.dump(self.tokens, f)
+            self._write_json(self.reset_tokens_file, self.tokens)
             logger.info("Tokens saved successfully")
         except Exception as e:
             logger.error(f"Error saving tokens: {e}")
@@ -61,9 +79,7 @@ class PasswordResetManager:
     def _save_verification_codes(self):
         """Save verification codes to file"""
         try:
-            self.verification_codes_file.parent.mkdir(exist_ok=True)
-            with open(self.verification_codes_file, 'w') as f:
-                json.dump(self.verification_codes, f)
+            self._write_json(self.verification_codes_file, self.verification_codes)
             logger.info("Verification codes saved successfully")
         except Exception as e:
             logger.error(f"Error saving verification codes: {e}")
@@ -71,8 +87,8 @@ class PasswordResetManager:
     def generate_verification_code(self, email: str) -> str:
         """Generate a 6-digit verification code"""
         try:
-            code = ''.join([str(secrets.randbelow(10)) for _ in range(6)])
-            expiry = (datetime.now() + self.code_expiry).isoformat()
+            code = f"{secrets.randbelow(1_000_000):06d}"
+            expiry = int(time.time() + self.code_expiry.total_seconds())
 
             self.verification_codes[email] = {
                 'code': code,
@@ -89,14 +105,12 @@ class PasswordResetManager:
     def verify_code(self, email: str, code: str) -> bool:
         """Verify the provided code"""
         try:
-            if email not in self.verification_codes:
+            code_data = self.verification_codes.get(email)
+            if code_data is None:
                 logger.warning(f"No verification code found for {email}")
                 return False
 
-            code_data = self.verification_codes[email]
-            expiry = datetime.fromisoformat(code_data['expiry'])
-
-            if datetime.now() > expiry:
+            if time.time() > code_data['expiry']:
                 logger.warning(f"Verification code expired for {email}")
                 del self.verification_codes[email]
                 self._save_verification_codes()
@@ -108,7 +122,7 @@ class PasswordResetManager:
                 self._save_verification_codes()
                 return False
 
-            if code_data['code'] != code:
+            if not hmac.compare_digest(code_data['code'].encode('utf-8'), code.encode('utf-8')):
                 code_data['attempts'] += 1
                 self._save_verification_codes()
                 logger.warning(f"Invalid verification code attempt for {email}")
@@ -124,7 +138,7 @@ class PasswordResetManager:
         """Generate a secure reset token"""
         try:
             token = secrets.token_urlsafe(32)
-            expiry = (datetime.now() + timedelta(hours=1)).isoformat()
+            expiry = int(time.time() + timedelta(hours=1).total_seconds())
 
             self.tokens[token] = {
                 'email': email,
@@ -141,17 +155,23 @@ class PasswordResetManager:
     def verify_token(self, token: str) -> tuple[bool, str]:
         """Verify if a token is valid and not expired"""
         try:
-            if token not in self.tokens:
+            # Compare against every stored token in constant time rather than
+            # relying on a hashed dict lookup
+            token_bytes = token.encode('utf-8')
+            token_data = None
+            for stored_token, data in self.tokens.items():
+                if hmac.compare_digest(stored_token.encode('utf-8'), token_bytes):
+                    token_data = data
+
+            if token_data is None:
                 logger.warning("Invalid reset token")
                 return False, "Invalid reset token"
 
-            token_data = self.tokens[token]
             if token_data['used']:
                 logger.warning("Token already used")
                 return False, "Token has already been used"
 
-            expiry = datetime.fromisoformat(token_data['expiry'])
-            if datetime.now() > expiry:
+            if time.time() > token_data['expiry']:
                 logger.warning("Token expired")
                 return False, "Token has expired"
 
@@ -171,6 +191,29 @@ class PasswordResetManager:
         except Exception as e:
             logger.error(f"Error marking token as used: {e}")
 
+    def _send_sync(self, msg):
+        """Deliver a message over SMTP"""
+        with smtplib.SMTP(os.environ['SMTP_SERVER'], int(os.environ['SMTP_PORT'])) as server:
+            server.starttls()
+            server.login(os.environ['SMTP_USERNAME'], os.environ['SMTP_PASSWORD'])
+            server.sendmail(msg['From'], [msg['To']], msg.as_string())
+
+    def _send_async(self, msg, kind):
+        """Queue a message for delivery and log the outcome when it completes"""
+        # Fail fast on missing SMTP settings instead of in the worker
+        missing = [key for key in ('SMTP_SERVER', 'SMTP_PORT', 'SMTP_PASSWORD') if key not in os.environ]
+        if missing:
+            raise KeyError(f"Missing SMTP settings: {', '.join(missing)}")
+
+        def log_result(future):
+            error = future.exception()
+            if error:
+                logger.warning(f"Failed to deliver {kind} email to {msg['To']}: {error}")
+            else:
+                logger.info(f"{kind.capitalize()} email sent to {msg['To']}")
+
+        _mail_pool.submit(self._send_sync, msg).add_done_callback(log_result)
+
     def send_verification_email(self, email: str, code: str) -> bool:
         """Send verification code email"""
         try:
@@ -191,12 +234,8 @@ class PasswordResetManager:
             msg['From'] = os.environ['SMTP_USERNAME']
             msg['To'] = email
 
-            with smtplib.SMTP(os.environ['SMTP_SERVER'], int(os.environ['SMTP_PORT'])) as server:
-                server.starttls()
-                server.login(os.environ['SMTP_USERNAME'], os.environ['SMTP_PASSWORD'])
-                server.sendmail(msg['From'], [msg['To']], msg.as_string())
-
-            logger.info(f"Verification email sent to {email}")
+            self._send_async(msg, "verification")
+            logger.info(f"Verification email queued for {email}")
             return True
         except Exception as e:
             logger.error(f"Failed to send verification email: {e}")
@@ -224,12 +263,8 @@ class PasswordResetManager:
             msg['From'] = os.environ['SMTP_USERNAME']
             msg['To'] = email
 
-            with smtplib.SMTP(os.environ['SMTP_SERVER'], int(os.environ['SMTP_PORT'])) as server:
-                server.starttls()
-                server.login(os.environ['SMTP_USERNAME'], os.environ['SMTP_PASSWORD'])
-                server.sendmail(msg['From'], [msg['To']], msg.as_string())
-
-            logger.info(f"Reset email sent to {email}")
+            self._send_async(msg, "reset")
+            logger.info(f"Reset email queued for {email}")
             return True
         except Exception as e:
             logger.error(f"Failed to send reset email: {e}")
@@ -238,18 +273,18 @@ class PasswordResetManager:
     def cleanup_expired_tokens(self):
         """Remove expired tokens"""
         try:
-            current_time = datetime.now()
-            self.tokens = {
-                token: data for token, data in self.tokens.items()
-                if datetime.fromisoformat(data['expiry']) > current_time
-            }
-            self._save_tokens()
+            current_time = int(time.time())
+            expired_tokens = [token for token, data in self.tokens.items() if data['expiry'] <= current_time]
+            for token in expired_tokens:
+                del self.tokens[token]
+            if expired_tokens:
+                self._save_tokens()
 
-            self.verification_codes = {
-                email: data for email, data in self.verification_codes.items()
-                if datetime.fromisoformat(data['expiry']) > current_time
-            }
-            self._save_verification_codes()
+            expired_codes = [email for email, data in self.verification_codes.items() if data['expiry'] <= current_time]
+            for email in expired_codes:
+                del self.verification_codes[email]
+            if expired_codes:
+                self._save_verification_codes()
             logger.info("Cleanup of expired tokens completed")
         except Exception as e:
             logger.error(f"Error during cleanup: {e}")
\ No newline at end of file
@@ -1,92 +1,206 @@
+import asyncio
+import threading
+import aiohttp
+from cachetools import TTLCache
+import requests
+from requests.adapters import HTTPAdapter
 import trafilatura
 import re
-from typing import Optional, Dict
-import requests
-from bs4 import BeautifulSoup
+import html
+from typing import Optional, Dict, List
 import json
 
+# Targeted scans for structured data and the page title, so no DOM is built
+# og:title accepts either attribute order and closes on the quote that opened the content
+OG_TITLE_RE = re.compile(
+    r'<meta(?=[^>]*\bproperty=(["\'])og:title\1)[^>]*\bcontent=(["\'])(?P<title>.*?)\2', re.I | re.S
+)
+TITLE_RE = re.compile(r'<title[^>]*>(?P<title>.*?)</title>', re.I | re.S)
+LDJSON_RE = re.compile(r'<script[^>]+application/ld\+json[^>]*>(.*?)</script>', re.I | re.S)
+
+# Statuses meaning the page is gone; rate limits and server errors are retried
+GONE_STATUSES = frozenset({404, 410})
+
 class PriceTracker:
-    def __init__(self):
-        self.price_patterns = [
-            r'\$\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',  # $XX.XX or $X,XXX.XX
-            r'(\d+(?:,\d{3})*(?:\.\d{2})?)\s*USD',  # XX.XX USD
-            r'Price:\s*\$\s*(\d+(?:,\d{3})*(?:\.\d{2})?)',  # Price: $XX.XX
-        ]
+    def __init__(self, scan_limit: int = 65536, cache_ttl: int = 300, negative_ttl: int = 600):
+        # One alternation so the text is scanned once; the labeled form is
+        # tried first so "Price: $XX.XX" wins over a bare dollar amount
+        amount = r'\d+(?:,\d{3})*(?:\.\d{2})?'
+        self._price_re = re.compile(
+            rf'Price:\s*\$\s*(?P<labeled>{amount})'  # Price: $XX.XX
+            rf'|\$\s*(?P<dollar>{amount})'  # $XX.XX or $X,XXX.XX
+            rf'|(?P<usd>{amount})\s*USD'  # XX.XX USD
+        )
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        # Prices sit near the top of the product text; reviews below are skipped
+        self.scan_limit = scan_limit
+        self.timeout = aiohttp.ClientTimeout(total=30)
+
+        # Recent fetch results per URL; the lock covers concurrent sessions
+        self._cache = TTLCache(maxsize=512, ttl=cache_ttl)
+        # URLs that recently gave no price (gone, empty or priceless pages)
+        self._negative_cache = TTLCache(maxsize=1024, ttl=negative_ttl)
+        self._cache_lock = threading.Lock()
+
+        # Pooled keep-alive session for single-URL fetches
+        self.request_timeout = (5, 30)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
     def _extract_price(self, text: str) -> Optional[float]:
-        """Extract price from text using multiple patterns"""
+        """Extract the first price in the text"""
         if not text:
             return None
 
-        # Try each pattern
-        for pattern in self.price_patterns:
-            matches = re.search(pattern, text)
-            if matches:
+        # Every price pattern needs a "$" or "USD", so skip the regex without one
+        if '$' not in text and 'USD' not in text:
+            return None
+
+        matches = self._price_re.search(text, 0, self.scan_limit)
+        if not matches:
+            return None
+
+        try:
+            price_str = matches.group('labeled') or matches.group('dollar') or matches.group('usd')
+            # Only amounts over 999 carry thousands separators to strip
+            if ',' in price_str:
+                price_str = price_str.replace(',', '')
+            return float(price_str)
+        except (ValueError, AttributeError):
+            return None
+
+    def _parse_product(self, url: str, downloaded: str) -> Optional[Dict]:
+        """Extract product name and price from a downloaded page"""
+        # Extract main content and page metadata (og:title or <title>) in one pass
+        document = trafilatura.bare_extraction(downloaded, with_metadata=True)
+        text_content = document.text if document else None
+        price = self._extract_price(text_content)
+
+        if not price:
+            # Look for structured price data
+            for raw in LDJSON_RE.findall(downloaded):
+                # Skip blocks that cannot hold an offer without parsing them
+                if '"offers"' not in raw:
+                    continue
                 try:
-                    # Remove commas and convert to float
-                    price_str = matches.group(1).replace(',', '')
-                    return float(price_str)
-                except (ValueError, IndexError):
+                    data = json.loads(raw)
+                    if isinstance(data, dict):
+                        if 'offers' in data and 'price' in data['offers']:
+                            price = float(data['offers']['price'])
+                            break
+                except (json.JSONDecodeError, ValueError):
                     continue
+
+        if price:
+            name = document.title if document else None
+            if not name:
+                # trafilatura gives up on pages with little body text; scan
+                # og:title or <title> directly instead
+                title = OG_TITLE_RE.search(downloaded) or TITLE_RE.search(downloaded)
+                name = html.unescape(title.group('title')).strip() if title else None
+            if not name:
+                name = f"Product from {url}"
+
+            return {
+                'name': name,
+                'price': price,
+                'url': url
+            }
         return None
 
+    def _cached(self, url: str) -> Optional[Dict]:
+        """Return a still-fresh fetch result for the URL, if any"""
+        with self._cache_lock:
+            return self._cache.get(url)
+
+    def _known_missing(self, url: str) -> bool:
+        """Check whether the URL recently gave no price"""
+        with self._cache_lock:
+            return url in self._negative_cache
+
+    def _remember(self, url: str, product_info: Optional[Dict]) -> Optional[Dict]:
+        """Cache a fetch result in the positive or negative cache and pass it through"""
+        with self._cache_lock:
+            if product_info:
+                self._cache[url] = product_info
+            else:
+                self._negative_cache[url] = True
+        return product_info
+
+    def clear_negative_cache(self):
+        """Forget every URL that recently gave no price"""
+        with self._cache_lock:
+            self._negative_cache.clear()
+
     def fetch_product_info(self, url: str) -> Optional[Dict]:
         """Fetch product information from the given URL"""
+        cached = self._cached(url)
+        if cached:
+            return cached
+        if self._known_missing(url):
+            return None
+
         try:
             # Download and extract content
-            downloaded = trafilatura.fetch_url(url, headers=self.headers)
-            if not downloaded:
+            response = self.session.get(url, timeout=self.request_timeout)
+            if response.status_code != 200:
+                if response.status_code in GONE_STATUSES:
+                    return self._remember(url, None)
                 return None
+            # requests assumes ISO-8859-1 for text/html without a charset;
+            # detect the encoding from the body instead, as trafilatura's fetcher did
+            if 'charset' not in response.headers.get('Content-Type', '').lower():
+                response.encoding = response.apparent_encoding
+            downloaded = response.text
+            if not downloaded:
+                return self._remember(url, None)
+
+            return self._remember(url, self._parse_product(url, downloaded))
+        except Exception as e:
+            print(f"Error fetching product info: {e}")
+            return None
 
-            # Extract main content
-            text_content = trafilatura.extract(downloaded)
-            price = self._extract_price(text_content)
-
-            if not price:
-                # Try getting structured data
-                response = requests.get(url, headers=self.headers)
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # Look for structured price data
-                for script in soup.find_all('script', type='application/ld+json'):
-                    try:
-                        data = json.loads(script.string)
-                        if isinstance(data, dict):
-                            if 'offers' in data and 'price' in data['offers']:
-                                price = float(data['offers']['price'])
-                                break
-                    except (json.JSONDecodeError, ValueError):
-                        continue
-
-            if price:
-                # Extract product name from meta tags or title
-                name = None
-                soup = BeautifulSoup(downloaded, 'html.parser')
-                meta_title = soup.find('meta', property='og:title')
-                if meta_title:
-                    name = meta_title['content']
-                else:
-                    title = soup.find('title')
-                    if title:
-                        name = title.text.strip()
-
-                if not name:
-                    name = f"Product from {url}"
-
-                return {
-                    'name': name,
-                    'price': price,
-                    'url': url
-                }
+    async def fetch_product_info_async(self, session: aiohttp.ClientSession, url: str) -> Optional[Dict]:
+        """Fetch product information from the given URL on a shared aiohttp session"""
+        cached = self._cached(url)
+        if cached:
+            return cached
+        if self._known_missing(url):
             return None
 
+        try:
+            async with session.get(url) as response:
+                if response.status != 200:
+                    if response.status in GONE_STATUSES:
+                        return self._remember(url, None)
+                    return None
+                downloaded = await response.text()
+            if not downloaded:
+                return self._remember(url, None)
+
+            return self._remember(url, self._parse_product(url, downloaded))
         except Exception as e:
             print(f"Error fetching product info: {e}")
             return None
 
+    async def _refresh_all(self, urls: List[str]) -> List[Optional[Dict]]:
+        """Fetch every URL concurrently over one connection pool"""
+        async with aiohttp.ClientSession(headers=self.headers, timeout=self.timeout) as session:
+            return await asyncio.gather(*(self.fetch_product_info_async(session, url) for url in urls))
+
+    def refresh_all(self, urls: List[str]) -> List[Optional[Dict]]:
+        """Fetch product information for many URLs at once, in the order given"""
+        try:
+            return asyncio.run(self._refresh_all(urls))
+        except Exception as e:
+            print(f"Error refreshing products: {e}")
+            return [None] * len(urls)
+
     def get_current_price(self, url: str) -> Optional[float]:
         """Get the current price from the product URL"""
         try: